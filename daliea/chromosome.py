@@ -6,6 +6,8 @@ import copy
 
 DELTA_FACTOR = 0.01  # Max delta factor for soft mutations
 SIGMA_FACTOR = 0.01  # Sigma as factor of max dimensions for gaussian mutations
+GROWTH_START = 5  # Number of genes a growing chromosome starts with
+GROWTH_STALL = 500  # Generations without improvement before adding a gene
 
 
 class Chromosome(object):
@@ -18,6 +20,7 @@ class Chromosome(object):
         self.size_y = None
         self.n_vertices = None
         self.n_genes = None
+        self.max_genes = None
         self.genes = []
         self.phenotype = None
         self.fitness = None  # the closer to 0 the better
@@ -29,22 +32,28 @@ class Chromosome(object):
         self.mutations = 0
         self.evolution_time = 0
 
-    def setup(self, size_x, size_y, n_vertices, n_genes):
+    def setup(self, size_x, size_y, n_vertices, n_genes, growth=False):
         """Setup  chromosome with all values at zero
 
         Attributes
             size_x      Maximum X coordinate (can't exceed the image)
             size_y      Maximum Y coordinate (can't exceed the image)
             n_vertices  The number of vertices per gene
-            n_genes     Number of genes per chromosome"""
+            n_genes     Number of genes per chromosome
+            growth      If True start with GROWTH_START genes and let grow()
+                        add more up to n_genes."""
 
         self.size_x = size_x
         self.size_y = size_y
         self.n_vertices = n_vertices
-        self.n_genes = n_genes
+        self.max_genes = n_genes
+        if growth is True:
+            self.n_genes = min(GROWTH_START, n_genes)
+        else:
+            self.n_genes = n_genes
 
         self.genes = []
-        for i in range(n_genes):
+        for i in range(self.n_genes):
             gene = Gene(size_x, size_y, n_vertices)
             self.genes.append(gene)
         self.phenotype = None
@@ -67,17 +76,67 @@ class Chromosome(object):
             color       Color tuple, defaults to all white."""
         canvas = Image.new('RGBA', (self.size_x, self.size_y), color)
         poly = Image.new('RGBA', (self.size_x, self.size_y))
-        pdraw = ImageDraw.Draw(poly)
-        for gene in self.genes:
-            # if fully transparent, don't render it
-            if gene.color[3] != 0:
-                pdraw.polygon(gene.vertices, gene.color)
-                canvas.paste(poly, mask=poly)
+        _render_genes(canvas, poly, self.genes)
         self.phenotype = canvas.convert("RGB")
-        del pdraw
         del poly
         del canvas
 
+    @staticmethod
+    def make_phenotypes(chromosomes, parent, color=(255, 255, 255, 255),
+                        out=None):
+        """Return the phenotypes of chromosomes descending from parent as
+        one (K, size_y, size_x, 3) uint8 array. The genes all chromosomes
+        share with the parent are rendered only once. Unlike make_phenotype
+        the phenotype atribute of the chromosomes is left untouched.
+
+        Attributes
+            chromosomes List of K chromosomes with the size of parent
+            parent      Common parent chromosome
+            color       Color tuple, defaults to all white.
+            out         Optional preallocated array to render into."""
+
+        shape = (len(chromosomes), parent.size_y, parent.size_x, 3)
+        if out is None:
+            out = np.empty(shape, dtype=np.uint8)
+        elif out.shape != shape:
+            raise ValueError("method make_phenotypes @ chromosome doesn't\
+                             accept out of shape %s" % (out.shape,))
+
+        # Length of the gene stack prefix unchanged in every chromosome
+        prefix = min([len(parent.genes)] + [len(c.genes) for c in chromosomes])
+        for chromosome in chromosomes:
+            for i in range(prefix):
+                if not _same_gene(chromosome.genes[i], parent.genes[i]):
+                    prefix = i
+                    break
+
+        canvas = Image.new('RGBA', (parent.size_x, parent.size_y), color)
+        poly = Image.new('RGBA', (parent.size_x, parent.size_y))
+        _render_genes(canvas, poly, parent.genes[:prefix])
+
+        for k, chromosome in enumerate(chromosomes):
+            k_canvas = canvas.copy()
+            k_poly = poly.copy()
+            _render_genes(k_canvas, k_poly, chromosome.genes[prefix:])
+            out[k] = np.asarray(k_canvas.convert("RGB"))
+            del k_poly
+            del k_canvas
+
+        return out
+
+    @staticmethod
+    def calc_fitnesses(phenotypes, target):
+        """Return the K fitness values of a (K, size_y, size_x, 3) phenotype
+        array, as calc_fitness would compute them, in one reduction.
+
+        Attributes
+            phenotypes  Array returned by Chromosome.make_phenotypes
+            target      Target image in PIL Image format."""
+
+        omega = np.asarray(target, dtype=np.int16)
+        handicap = np.abs(phenotypes.astype(np.int16) - omega)
+        return handicap.sum(axis=(1, 2, 3), dtype=np.int64)
+
     def calc_fitness(self, target):
         """Update fitness atribute by comparing with the target image. The lower
         the number the better the fitness.
@@ -91,6 +150,26 @@ class Chromosome(object):
         self.fitness = np.sum(img_stats.sum)
         self.fitness_p = 100. * (1. - (self.fitness/self.max_handicap))
 
+    def grow(self, insert=False):
+        """Inplace add one transparent gene, up to max_genes. Being
+        transparent, the new gene leaves phenotype and fitness unchanged.
+        Returns True if a gene was added.
+
+        Attributes
+            insert      If True insert the gene at a random position,
+                        otherwise append it on top of the others."""
+
+        if self.n_genes >= self.max_genes:
+            return False
+
+        gene = Gene(self.size_x, self.size_y, self.n_vertices)
+        if insert is True:
+            self.genes.insert(np.random.randint(self.n_genes + 1), gene)
+        else:
+            self.genes.append(gene)
+        self.n_genes = self.n_genes + 1
+        return True
+
     def mutate(self, mutation, swap=False, n_mut=1):
         """Inplace mutate one gene according to type of mutation.
 
@@ -174,3 +253,20 @@ class Chromosome(object):
 
         self.genes[gene_n1] = gene2
         self.genes[gene_n2] = gene1
+
+
+def _render_genes(canvas, poly, genes):
+    """Inplace render genes on canvas, using poly as the polygon layer."""
+    pdraw = ImageDraw.Draw(poly)
+    for gene in genes:
+        # if fully transparent, don't render it
+        if gene.color[3] != 0:
+            pdraw.polygon(gene.vertices, gene.color)
+            canvas.paste(poly, mask=poly)
+    del pdraw
+
+
+def _same_gene(gene1, gene2):
+    """Return True if both genes render the same polygon."""
+    return (gene1 is gene2 or
+            (gene1.color == gene2.color and gene1.vertices == gene2.vertices))
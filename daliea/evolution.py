@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from PySide2.QtCore import QObject, Signal, Slot
 from PySide2.QtWidgets import QApplication
-import copy
+from selection import Selection
 
 
 class Evolution(QObject):
@@ -12,32 +12,19 @@ class Evolution(QObject):
         self.chromosome = chromosome
         self._stop_flag = None
         self._mtype_flag = 'All'
+        self._growth_flag = 'Off'
+        self._exporter = None
         # self._polynum_flag = None
 
     @Slot(object)
     def evolve(self, omega):
-        c_descendant = copy.deepcopy(self.chromosome)
+        selection = Selection(self.chromosome, omega)
 
         while self._stop_flag is False:
-            c_descendant.mutate(self._mtype_flag, swap=True)
-            c_descendant.generations = c_descendant.generations + 1
-            self.chromosome.generations = self.chromosome.generations + 1
-            c_descendant.make_phenotype((0, 0, 0, 255))
-            c_descendant.calc_fitness(omega)
-            # If descendant is less fit than parent keep parent
-            if c_descendant.fitness > self.chromosome.fitness:
-                c_descendant = copy.deepcopy(self.chromosome)
-            # If descendant as fit as parent keep descendant
-            elif c_descendant.fitness == self.chromosome.fitness:
-                self.chromosome = copy.deepcopy(c_descendant)
-                self.chromosome.neutrals = self.chromosome.neutrals + 1
-                c_descendant.neutrals = c_descendant.neutrals + 1
-            # If descendant fitter than parent keep descendant
-            else:
-                self.chromosome = copy.deepcopy(c_descendant)
-                self.chromosome.mutations = self.chromosome.mutations + 1
-                c_descendant.mutations = c_descendant.mutations + 1
+            selection.step(self._mtype_flag, self._growth_flag,
+                           self._exporter)
 
+            self.chromosome = selection.parent
             self.mutated_sig.emit(self.chromosome)
             QApplication.processEvents()
 
@@ -53,6 +40,17 @@ class Evolution(QObject):
         # TODO: Error checking
         self._mtype_flag = value
 
+    @Slot(str)
+    def _set_growth_flag(self, value):
+        if value not in ['Off', 'Append', 'Insert']:
+            raise ValueError("method _set_growth_flag @ evolution doesn't\
+                              accept attribute %s" % value)
+        self._growth_flag = value
+
+    @Slot(object)
+    def _set_exporter(self, exporter):
+        self._exporter = exporter
+
     # @Slot(int)
     # def _set_polynum_flag(self, value):
     #     # TODO: Error checking
@@ -62,4 +60,6 @@ class Evolution(QObject):
         interface.evolve_sig.connect(self.evolve)
         interface.set_stop_flag_sig.connect(self._set_stop_flag)
         interface.set_mtype_flag_sig.connect(self._set_mtype_flag)
+        interface.set_growth_flag_sig.connect(self._set_growth_flag)
+        interface.set_exporter_sig.connect(self._set_exporter)
         # interface.set_polynum_flag_sig.connect(self._set_polynum_flag)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import os
+import queue
+import re
+import threading
+import time
+
+FRAME_QUEUE = 16  # Max frames waiting to be written before dropping
+FRAME_NAME = re.compile(r'^frame_(\d{6})\.png$')
+
+
+class FrameExporter(object):
+    """Define class to write a time-lapse image sequence in the background"""
+
+    def __init__(self, directory, every_n=1, every_t=None,
+                 maxsize=FRAME_QUEUE):
+        """Initialize exporter and start its writer thread
+
+        Attributes
+            directory   Directory for the frame_XXXXXX.png sequence, an
+                        existing sequence is continued, not overwritten
+            every_n     Keep one frame every n offered mutations
+            every_t     If set, keep one frame every every_t seconds instead
+            maxsize     Frames waiting to be written, further frames are
+                        dropped rather than slowing the evolution."""
+
+        if every_n < 1:
+            raise ValueError("class FrameExporter @ export doesn't accept\
+                             every_n %s" % every_n)
+        if every_t is not None and every_t <= 0:
+            raise ValueError("class FrameExporter @ export doesn't accept\
+                             every_t %s" % every_t)
+        self.directory = directory
+        self.every_n = every_n
+        self.every_t = every_t
+        self.frames = 0
+        self.dropped = 0
+        self._offers = 0
+        self._last_t = None
+        self._queue = queue.Queue(maxsize=maxsize)
+
+        os.makedirs(directory, exist_ok=True)
+        self._next = 0  # index of the next frame written, writer only
+        for filename in os.listdir(directory):
+            match = FRAME_NAME.match(filename)
+            if match:
+                self._next = max(self._next, int(match.group(1)) + 1)
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def offer(self, chromosome):
+        """Queue the chromosome phenotype if the sampling policy keeps it.
+        Never blocks, returns True if the frame was queued.
+
+        Attributes
+            chromosome  Accepted chromosome, its phenotype must not be
+                        changed in place afterwards."""
+
+        self._offers = self._offers + 1
+        if self.every_t is not None:
+            now = time.time()
+            if self._last_t is not None and now - self._last_t < self.every_t:
+                return False
+            self._last_t = now
+        elif self._offers % self.every_n != 0:
+            return False
+
+        try:
+            self._queue.put_nowait(chromosome.phenotype)
+        except queue.Full:
+            self.dropped = self.dropped + 1
+            return False
+        self.frames = self.frames + 1
+        return True
+
+    def stop(self):
+        """Write the frames still queued and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write(self):
+        while True:
+            phenotype = self._queue.get()
+            if phenotype is None:
+                break
+            # Only a saved frame takes an index, so the sequence has no gaps.
+            filename = os.path.join(self.directory,
+                                    'frame_%06d.png' % self._next)
+            try:
+                phenotype.save(filename)
+            except OSError:
+                self.dropped = self.dropped + 1
+            else:
+                self._next = self._next + 1
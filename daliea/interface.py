@@ -6,17 +6,19 @@ from PySide2.QtWidgets import (
     QLineEdit, QSpinBox)
 from PySide2.QtGui import QPixmap
 from PySide2.QtCore import Qt, Signal, Slot
-from PIL import (Image, ImageQt)
+from PIL import ImageQt
+from export import FrameExporter
+from selection import load_omega
 import sys
 import time
 
-MAX_SIZE = 256
-
 
 class Interface(QWidget):
     evolve_sig = Signal(object)
     set_stop_flag_sig = Signal(bool)
     set_mtype_flag_sig = Signal(str)
+    set_growth_flag_sig = Signal(str)
+    set_exporter_sig = Signal(object)
 
     def __init__(self, chromosome):
         # super().__init__()
@@ -32,6 +34,7 @@ class Interface(QWidget):
         self.neutrals = 0
         self.evolution_st = 0.0
         self.evolution_dt = 0.0
+        self.exporter = None
 
         # Omega Group
         omega_gbox = QGroupBox()
@@ -55,6 +58,9 @@ class Interface(QWidget):
         alpha_btn_save = QPushButton('Save', self)
         # alpha_btn_save.clicked.connect(self.alpha_save)
         alpha_vbox.addWidget(alpha_btn_save)
+        self._record_btn = QPushButton('Record', self)
+        self._record_btn.clicked.connect(self._record_toggle)
+        alpha_vbox.addWidget(self._record_btn)
         alpha_gbox.setLayout(alpha_vbox)
 
         # Configure Group
@@ -73,11 +79,25 @@ class Interface(QWidget):
         self.polynum.setMinimum(1)
         self.polynum.setMaximum(1000)
         self.polynum.setValue(50)
+        self.growth = QComboBox()
+        config_lbox.addRow(QLabel("Growth:"), self.growth)
+        growth_list = ['Off', 'Append', 'Insert']
+        self.growth.addItems(growth_list)
+        self.growth.currentTextChanged.connect(self._growth_changed)
         self.vertnum = QSpinBox()
         config_lbox.addRow(QLabel("Vertices:"), self.vertnum)
         self.vertnum.setMinimum(3)
         self.vertnum.setMaximum(10)
         self.vertnum.setValue(4)
+        self.framemode = QComboBox()
+        config_lbox.addRow(QLabel("Frame mode:"), self.framemode)
+        framemode_list = ['Mutations', 'Seconds']
+        self.framemode.addItems(framemode_list)
+        self.framenum = QSpinBox()
+        config_lbox.addRow(QLabel("Frame every:"), self.framenum)
+        self.framenum.setMinimum(1)
+        self.framenum.setMaximum(1000)
+        self.framenum.setValue(10)
         config_gbox.setLayout(config_lbox)
 
         # Status Group
@@ -136,12 +156,29 @@ class Interface(QWidget):
         self.setWindowTitle('DaliEA')
         self.show()
 
+    def closeEvent(self, event):
+        """Write the recorded frames still queued before closing."""
+        if self.exporter is not None:
+            self.set_exporter_sig.emit(None)
+            self.exporter.stop()
+            self.exporter = None
+        event.accept()
+
     def center(self):
         qr = self.frameGeometry()
         cp = QDesktopWidget().availableGeometry().center()
         qr.moveCenter(cp)
         self.move(qr.topLeft())
 
+    def get_frames_dirname(self):
+        """Create dialog for choosing the time-lapse directory."""
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+        dirname = QFileDialog.getExistingDirectory(
+            self, "Record Frames To", "./", options=options)
+
+        return dirname
+
     def get_img_filename(self):
         """Create dialog for choosing image."""
         options = QFileDialog.Options()
@@ -157,23 +194,7 @@ class Interface(QWidget):
         filename = self.get_img_filename()
 
         if filename:
-            self.omega = Image.open(filename)
-            omega_width = self.omega.width
-            omega_height = self.omega.height
-            omega_ratio = omega_width/omega_height
-
-            if omega_ratio >= 1.:
-                new_width = MAX_SIZE
-                new_height = int(MAX_SIZE/omega_ratio)
-                self.omega = self.omega.resize((new_width, new_height),
-                                               Image.LANCZOS)
-            else:
-                new_height = MAX_SIZE
-                new_width = int(MAX_SIZE*omega_ratio)
-                self.omega = self.omega.resize((new_width, new_height),
-                                               Image.LANCZOS)
-
-            self.omega = self.omega.convert("RGB")
+            self.omega = load_omega(filename)
 
             self.omega_display = ImageQt.ImageQt(self.omega)
             pixmap = QPixmap.fromImage(self.omega_display)
@@ -194,7 +215,9 @@ class Interface(QWidget):
             height = self.omega.height
             polynum_val = self.polynum.value()
             vertnum_val = self.vertnum.value()
-            self.chromosome.setup(width, height, vertnum_val, polynum_val)
+            growth_val = self.growth.currentText() != 'Off'
+            self.chromosome.setup(width, height, vertnum_val, polynum_val,
+                                  growth_val)
             self.chromosome.make_phenotype((0, 0, 0, 255))
             self.chromosome.calc_fitness(self.omega)
 
@@ -223,6 +246,29 @@ class Interface(QWidget):
         """Send mutation type signal to evolution."""
         self.set_mtype_flag_sig.emit(self.mtype.currentText())
 
+    def _growth_changed(self):
+        """Send growth mode signal to evolution."""
+        self.set_growth_flag_sig.emit(self.growth.currentText())
+
+    def _record_toggle(self):
+        """Start or stop writing accepted alphas as a time-lapse."""
+        if self.exporter is None:
+            dirname = self.get_frames_dirname()
+            if dirname:
+                if self.framemode.currentText() == 'Seconds':
+                    self.exporter = FrameExporter(
+                        dirname, every_t=self.framenum.value())
+                else:
+                    self.exporter = FrameExporter(
+                        dirname, every_n=self.framenum.value())
+                self.set_exporter_sig.emit(self.exporter)
+                self._record_btn.setText('Stop Rec.')
+        else:
+            self.set_exporter_sig.emit(None)
+            self.exporter.stop()
+            self.exporter = None
+            self._record_btn.setText('Record')
+
     # def _polynum_changed(self):
     #     """Send polynum signal to evolution."""
     #     self.set_polynum_flag_sig.emit(self.polynum.valueFromText())
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from chromosome import GROWTH_STALL
+from PIL import Image
+import copy
+
+MAX_SIZE = 256
+BACKGROUND = (0, 0, 0, 255)  # Canvas color phenotypes are rendered on
+
+
+def load_omega(filename):
+    """Return the target image resized to fit MAX_SIZE, in RGB.
+
+    Attributes
+        filename    Path to the target image."""
+    omega = Image.open(filename)
+    omega_ratio = omega.width/omega.height
+
+    if omega_ratio >= 1.:
+        new_width = MAX_SIZE
+        new_height = int(MAX_SIZE/omega_ratio)
+    else:
+        new_height = MAX_SIZE
+        new_width = int(MAX_SIZE*omega_ratio)
+    omega = omega.resize((new_width, new_height), Image.LANCZOS)
+
+    return omega.convert("RGB")
+
+
+class Selection(object):
+    """Define class to hold the parent and descendant being evolved"""
+
+    def __init__(self, chromosome, omega):
+        """Initialize selection from an already setup chromosome
+
+        Attributes
+            chromosome  Parent chromosome, with fitness calculated
+            omega       Target image in PIL Image format"""
+
+        self.parent = chromosome
+        self.descendant = copy.deepcopy(chromosome)
+        self.omega = omega
+        self.stalls = 0  # generations since the last improvement
+
+    def step(self, mutation, growth='Off', exporter=None):
+        """Mutate the descendant once and keep the fittest of the two as
+        parent. Returns True if the descendant was fitter than the parent.
+
+        A parent that is replaced is never changed afterwards, except for its
+        generations counter, so it can be handed over to other threads.
+
+        Attributes
+            mutation    Mutation type, as in Chromosome.mutate
+            growth      One of 'Off', 'Append' or 'Insert'. Unless 'Off',
+                        a gene is added to the parent every GROWTH_STALL
+                        generations without improvement.
+            exporter    Optional FrameExporter offered every improvement"""
+
+        c_descendant = self.descendant
+        c_descendant.mutate(mutation, swap=True)
+        c_descendant.generations = c_descendant.generations + 1
+        self.parent.generations = self.parent.generations + 1
+        c_descendant.make_phenotype(BACKGROUND)
+        c_descendant.calc_fitness(self.omega)
+        # If descendant is less fit than parent keep parent
+        if c_descendant.fitness > self.parent.fitness:
+            self.descendant = copy.deepcopy(self.parent)
+            improved = False
+        # If descendant as fit as parent keep descendant
+        elif c_descendant.fitness == self.parent.fitness:
+            self.parent = copy.deepcopy(c_descendant)
+            self.parent.neutrals = self.parent.neutrals + 1
+            c_descendant.neutrals = c_descendant.neutrals + 1
+            improved = False
+        # If descendant fitter than parent keep descendant
+        else:
+            self.parent = copy.deepcopy(c_descendant)
+            self.parent.mutations = self.parent.mutations + 1
+            c_descendant.mutations = c_descendant.mutations + 1
+            improved = True
+
+        if improved is True:
+            self.stalls = 0
+            if exporter is not None:
+                exporter.offer(self.parent)
+        else:
+            self.stalls = self.stalls + 1
+
+        # If improvement stalled add a new gene to work with
+        if growth != 'Off' and self.stalls >= GROWTH_STALL:
+            self.stalls = 0
+            grown = copy.deepcopy(self.parent)
+            if grown.grow(growth == 'Insert'):
+                self.parent = grown
+                self.descendant = copy.deepcopy(grown)
+
+        return improved
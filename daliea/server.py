@@ -0,0 +1,515 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Execute with
+# $ python server.py --port 8765 --workers 2
+#
+# Clients talk newline delimited JSON over a local TCP socket, one request
+# per line, e.g.:
+#   {"cmd": "submit", "target": "../photos/pearl.jpg", "n_genes": 50}
+#   {"cmd": "subscribe", "job": 1}
+#   {"cmd": "image", "job": 1}
+
+from chromosome import Chromosome
+from export import FrameExporter
+from selection import (BACKGROUND, Selection, load_omega)
+import argparse
+import asyncio
+import base64
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+
+PROGRESS_EVERY = 100  # Generations between progress events
+SUBSCRIBER_QUEUE = 64  # Max pending events per client before dropping
+TERMINAL = ('finished', 'cancelled', 'failed')
+
+
+def _png(phenotype):
+    """Return the phenotype as a base64 PNG string."""
+    buf = io.BytesIO()
+    phenotype.save(buf, format='PNG')
+    return base64.b64encode(buf.getvalue()).decode('ascii')
+
+
+def _progress(chromosome):
+    """Return the JSON serializable progress of a chromosome."""
+    return {'generations': chromosome.generations,
+            'mutations': chromosome.mutations,
+            'neutrals': chromosome.neutrals,
+            'n_genes': chromosome.n_genes,
+            'fitness_p': float(chromosome.fitness_p)}
+
+
+def evolve(job_id, params, cancel, resume, updates):
+    """Evolve one job in a worker process with the same Selection as
+    Evolution. Sends ('progress', job_id, progress, png) every
+    PROGRESS_EVERY generations, png being None when the parent did not
+    improve since the last one, and ends with ('done', job_id, state, error,
+    progress, png).
+
+    Attributes
+        job_id      Id of the job, echoed in the updates
+        params      Dict of validated job settings, see Job
+        cancel      multiprocessing.Event ending the evolution
+        resume      multiprocessing.Event cleared while the job is paused
+        updates     multiprocessing.Queue the updates are put on"""
+
+    # Ctrl-C reaches the whole process group, the server cancels us itself.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    exporter = None
+    parent = None
+    state = 'finished'
+    error = None
+    try:
+        if params['frames'] is not None:
+            exporter = FrameExporter(params['frames'], params['frames_every'],
+                                     params['frames_seconds'])
+        omega = load_omega(params['target'])
+        parent = Chromosome()
+        parent.setup(omega.width, omega.height, params['n_vertices'],
+                     params['n_genes'], params['growth'] != 'Off')
+        parent.make_phenotype(BACKGROUND)
+        parent.calc_fitness(omega)
+        updates.put(('progress', job_id, _progress(parent),
+                     _png(parent.phenotype)))
+
+        selection = Selection(parent, omega)
+        sent = parent.mutations
+        while not cancel.is_set():
+            if not resume.is_set():
+                resume.wait()
+                continue
+            if (params['generations'] and
+                    parent.generations >= params['generations']):
+                break
+
+            selection.step(params['mutation'], params['growth'], exporter)
+            parent = selection.parent
+
+            if parent.generations % PROGRESS_EVERY == 0:
+                png = None
+                if parent.mutations != sent:
+                    sent = parent.mutations
+                    png = _png(parent.phenotype)
+                updates.put(('progress', job_id, _progress(parent), png))
+        if cancel.is_set():
+            state = 'cancelled'
+    except Exception as err:
+        state = 'failed'
+        error = str(err)
+    finally:
+        if exporter is not None:
+            exporter.stop()
+
+    progress = None
+    png = None
+    if getattr(parent, 'fitness_p', None) is not None:
+        progress = _progress(parent)
+        png = _png(parent.phenotype)
+    updates.put(('done', job_id, state, error, progress, png))
+
+
+class Job(object):
+    """Define class to hold one evolution job and its progress"""
+
+    def __init__(self, job_id, target, settings, frames_root=None):
+        """Initialize job in the 'queued' state
+
+        Attributes
+            job_id      Unique integer id of the job
+            target      Path to the target image
+            settings    Dict with optional keys 'n_genes' (1 to 1000),
+                        'n_vertices' (3 to 10), 'mutation', 'growth'
+                        ('Off', 'Append' or 'Insert'), 'frames'
+                        (time-lapse directory inside frames_root),
+                        'frames_every' (accepted mutations) or
+                        'frames_seconds', and 'generations' (0 runs until
+                        cancelled).
+            frames_root Directory time-lapses are written under, None
+                        refuses the 'frames' setting."""
+
+        self.job_id = job_id
+        self.target = target
+        n_genes = int(settings.get('n_genes', 50))
+        n_vertices = int(settings.get('n_vertices', 4))
+        mutation = settings.get('mutation', 'All')
+        growth = settings.get('growth', 'Off')
+        frames = settings.get('frames')
+        frames_every = int(settings.get('frames_every', 10))
+        frames_seconds = settings.get('frames_seconds')
+        generations = int(settings.get('generations', 0))
+        # Same limits as the Polygons and Vertices spin boxes
+        if not 1 <= n_genes <= 1000:
+            raise ValueError("class Job @ server doesn't accept\
+                             n_genes %s" % n_genes)
+        if not 3 <= n_vertices <= 10:
+            raise ValueError("class Job @ server doesn't accept\
+                             n_vertices %s" % n_vertices)
+        if mutation not in ['All', 'Hard', 'Medium', 'Soft', 'Gaussian']:
+            raise ValueError("class Job @ server doesn't accept\
+                             mutation %s" % mutation)
+        if growth not in ['Off', 'Append', 'Insert']:
+            raise ValueError("class Job @ server doesn't accept\
+                             growth %s" % growth)
+        if generations < 0:
+            raise ValueError("class Job @ server doesn't accept\
+                             generations %s" % generations)
+        if frames_every < 1:
+            raise ValueError("class Job @ server doesn't accept\
+                             frames_every %s" % frames_every)
+        if frames_seconds is not None:
+            frames_seconds = float(frames_seconds)
+            if frames_seconds <= 0:
+                raise ValueError("class Job @ server doesn't accept\
+                                 frames_seconds %s" % frames_seconds)
+        if frames is not None:
+            if frames_root is None:
+                raise ValueError("class Job @ server doesn't accept\
+                                 frames without a server frames root")
+            root = os.path.realpath(frames_root)
+            frames = os.path.realpath(os.path.join(root, str(frames)))
+            if os.path.commonpath([root, frames]) != root:
+                raise ValueError("class Job @ server doesn't accept\
+                                 frames outside of the frames root")
+
+        self.params = {'target': target, 'n_genes': n_genes,
+                       'n_vertices': n_vertices, 'mutation': mutation,
+                       'growth': growth, 'generations': generations,
+                       'frames': frames, 'frames_every': frames_every,
+                       'frames_seconds': frames_seconds}
+        self.state = 'queued'
+        self.error = None
+        self.progress = None
+        self.png = None
+        self.process = None
+        self._started = False
+        self._cancel = None
+        self._resume = None
+
+    def start(self, context, updates):
+        """Start evolving the job in a new process.
+
+        Attributes
+            context     multiprocessing context to create the process with
+            updates     multiprocessing.Queue the process reports to"""
+
+        self._cancel = context.Event()
+        self._resume = context.Event()
+        self._resume.set()
+        self.process = context.Process(
+            target=evolve, args=(self.job_id, self.params, self._cancel,
+                                 self._resume, updates),
+            daemon=True)
+        self.process.start()
+        self._started = True
+        self.state = 'running'
+
+    def cancel(self):
+        if self.state in TERMINAL:
+            return
+        if self._started:
+            self._cancel.set()
+            self._resume.set()  # wake up a paused worker so it can exit
+        else:
+            self.state = 'cancelled'
+
+    def pause(self):
+        if self.state in ('queued', 'running'):
+            if self._started:
+                self._resume.clear()
+            self.state = 'paused'
+
+    def resume(self):
+        if self.state == 'paused':
+            if self._started:
+                self._resume.set()
+                self.state = 'running'
+            else:
+                self.state = 'queued'
+
+    def status(self):
+        """Return a JSON serializable summary of the job."""
+        status = {'job': self.job_id, 'state': self.state,
+                  'target': self.target, 'generations': 0, 'mutations': 0,
+                  'neutrals': 0, 'n_genes': 0, 'fitness_p': None}
+        if self.progress is not None:
+            status.update(self.progress)
+        if self.error is not None:
+            status['error'] = self.error
+        return status
+
+
+class JobServer(object):
+    """Define class to run evolution jobs and stream their progress"""
+
+    def __init__(self, host='127.0.0.1', port=8765, workers=2,
+                 frames_root=None):
+        """Initialize server without starting it
+
+        Attributes
+            host        Interface to listen on, defaults to localhost
+            port        TCP port, 0 picks a free one
+            workers     Maximum number of jobs evolving at the same time,
+                        each in its own process. A paused job keeps its
+                        process, queued jobs wait for a running or paused
+                        job to end. Jobs paused while queued don't wait for
+                        a process.
+            frames_root Directory job time-lapses are confined to, None
+                        disables them."""
+
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.frames_root = frames_root
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._context = multiprocessing.get_context('spawn')
+        self._updates = self._context.Queue()
+        self._running = 0
+        self._watchers = set()
+        self._subscribers = {}  # job id -> set of asyncio.Queue
+        self._pump = None
+        self._closing = False
+        self._loop = None
+        self._server = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._pump = threading.Thread(target=self._pump_updates, daemon=True)
+        self._pump.start()
+        self._server = await asyncio.start_server(self._handle_client,
+                                                  self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Cancel every job and wait for their processes to end."""
+        self._closing = True
+        for job in self.jobs.values():
+            job.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        while self._watchers:
+            await asyncio.gather(*self._watchers)
+        if self._pump is not None:
+            self._updates.put(None)
+            await self._loop.run_in_executor(None, self._pump.join)
+
+    def submit(self, target, settings):
+        """Queue a new job and return it."""
+        job = Job(next(self._ids), target, settings, self.frames_root)
+        self.jobs[job.job_id] = job
+        self._schedule()
+        return job
+
+    def remove(self, job):
+        """Forget a finished, cancelled or failed job."""
+        if job.state not in TERMINAL:
+            raise ValueError("job %s is %s, cancel it first" %
+                             (job.job_id, job.state))
+        del self.jobs[job.job_id]
+
+    def _schedule(self):
+        """Start queued jobs while there are free workers."""
+        for job in list(self.jobs.values()):
+            if self._closing or self._running >= self.workers:
+                break
+            if job.state == 'queued':
+                job.start(self._context, self._updates)
+                self._running = self._running + 1
+                watcher = asyncio.ensure_future(self._watch(job))
+                self._watchers.add(watcher)
+                watcher.add_done_callback(self._watchers.discard)
+                self._broadcast(job.status())
+
+    async def _watch(self, job):
+        """Free the worker of job once its process ends."""
+        await self._loop.run_in_executor(None, job.process.join)
+        exitcode = job.process.exitcode
+        job.process = None
+        self._running = self._running - 1
+        # A clean exit always sent its 'done' update, a crash did not.
+        if exitcode != 0 and job.state not in TERMINAL:
+            job.state = 'failed'
+            job.error = "worker exited with code %s" % exitcode
+            self._broadcast(job.status())
+        self._schedule()
+
+    def _pump_updates(self):
+        """Hand the worker updates over to the event loop, in a thread."""
+        while True:
+            update = self._updates.get()
+            if update is None:
+                break
+            try:
+                self._loop.call_soon_threadsafe(self._update, update)
+            except RuntimeError:
+                break  # the event loop is closed
+
+    def _update(self, update):
+        job = self.jobs.get(update[1])
+        if job is None:
+            return
+        if update[0] == 'progress':
+            job.progress = update[2]
+            if update[3] is not None:
+                job.png = update[3]
+        elif update[0] == 'done':
+            job.state = update[2]
+            job.error = update[3]
+            if update[4] is not None:
+                job.progress = update[4]
+                job.png = update[5]
+        self._broadcast(job.status())
+
+    def _broadcast(self, status):
+        for queue in self._subscribers.get(status['job'], ()):
+            # Slow clients lose their oldest events, workers never wait.
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(status)
+
+    def _get_job(self, request):
+        try:
+            return self.jobs[int(request['job'])]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("unknown job %s" % request.get('job'))
+
+    async def _handle_client(self, reader, writer):
+        # Only the writer task writes, so drain() is never called twice.
+        lines = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE)
+        writer_task = asyncio.ensure_future(self._write_lines(writer, lines))
+        streams = []
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await lines.put({'error': "request line too long"})
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                    reply = self._dispatch(request, lines, streams)
+                except KeyError as err:
+                    reply = {'error': "missing key %s" % err}
+                except (TypeError, ValueError) as err:
+                    reply = {'error': str(err)}
+                if reply is not None:
+                    await lines.put(reply)
+        except ConnectionError:
+            pass
+        finally:
+            for task, job_id, queue in streams:
+                task.cancel()
+                self._subscribers[job_id].discard(queue)
+            # Let the replies already queued out before closing.
+            try:
+                lines.put_nowait(None)
+                await asyncio.wait_for(writer_task, 5)
+            except (asyncio.QueueFull, asyncio.TimeoutError):
+                writer_task.cancel()
+            writer.close()
+
+    async def _write_lines(self, writer, lines):
+        broken = False
+        while True:
+            reply = await lines.get()
+            if reply is None:
+                break
+            # Keep emptying the queue once the client is gone.
+            if broken:
+                continue
+            try:
+                writer.write((json.dumps(reply) + '\n').encode())
+                await writer.drain()
+            except ConnectionError:
+                broken = True
+
+    def _dispatch(self, request, lines, streams):
+        cmd = request.get('cmd')
+        if cmd == 'submit':
+            job = self.submit(request['target'], request)
+            return job.status()
+        elif cmd == 'list':
+            return {'jobs': [job.status() for job in self.jobs.values()]}
+        elif cmd == 'status':
+            return self._get_job(request).status()
+        elif cmd in ('cancel', 'pause', 'resume'):
+            job = self._get_job(request)
+            getattr(job, cmd)()
+            # A queued job has no worker yet to tell its subscribers.
+            status = job.status()
+            self._broadcast(status)
+            self._schedule()
+            return status
+        elif cmd == 'remove':
+            job = self._get_job(request)
+            self.remove(job)
+            return {'job': job.job_id, 'removed': True}
+        elif cmd == 'image':
+            job = self._get_job(request)
+            return {'job': job.job_id, 'png': job.png}
+        elif cmd == 'subscribe':
+            job = self._get_job(request)
+            queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE)
+            queue.put_nowait(job.status())
+            self._subscribers.setdefault(job.job_id, set()).add(queue)
+            task = asyncio.ensure_future(self._stream(queue, lines))
+            streams.append((task, job.job_id, queue))
+            return None
+        else:
+            raise ValueError("unknown command %s" % cmd)
+
+    async def _stream(self, queue, lines):
+        while True:
+            status = await queue.get()
+            await lines.put(status)
+            if status['state'] in TERMINAL:
+                break
+
+
+async def serve(server):
+    """Serve until cancelled, then cancel the jobs and wait for them."""
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = argparse.ArgumentParser(description='DaliEA job server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2,
+                        help='job processes at once, paused jobs included')
+    parser.add_argument('--frames-root', default=None,
+                        help='directory job time-lapses are written under')
+    args = parser.parse_args(argv)
+
+    server = JobServer(args.host, args.port, args.workers, args.frames_root)
+    try:
+        asyncio.run(serve(server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
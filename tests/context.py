@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..', 'daliea')))
+
+PEARL = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                     '..', 'photos', 'pearl.jpg'))
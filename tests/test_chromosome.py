@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+from .context import PEARL
+from chromosome import (Chromosome, GROWTH_START)
+from selection import (BACKGROUND, Selection, load_omega)
+from unittest import mock
+import copy
+import numpy as np
+import unittest
+
+
+class TestGrowth(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.omega = load_omega(PEARL).resize((32, 24))
+        self.chromosome = Chromosome()
+        self.chromosome.setup(32, 24, 4, 8, growth=True)
+        self.chromosome.make_phenotype(BACKGROUND)
+        self.chromosome.calc_fitness(self.omega)
+
+    def test_setup_starts_small(self):
+        self.assertEqual(self.chromosome.n_genes, GROWTH_START)
+        self.assertEqual(len(self.chromosome.genes), GROWTH_START)
+        self.assertEqual(self.chromosome.max_genes, 8)
+
+    def test_grow_keeps_fitness(self):
+        fitness = self.chromosome.fitness
+        for insert in [False, True]:
+            self.assertTrue(self.chromosome.grow(insert))
+            self.chromosome.make_phenotype(BACKGROUND)
+            self.chromosome.calc_fitness(self.omega)
+            self.assertEqual(self.chromosome.fitness, fitness)
+
+    def test_grow_stops_at_max_genes(self):
+        while self.chromosome.grow():
+            pass
+        self.assertEqual(self.chromosome.n_genes, 8)
+        self.assertEqual(len(self.chromosome.genes), 8)
+
+    def test_stalls_grow_to_max_genes(self):
+        selection = Selection(self.chromosome, self.omega)
+        with mock.patch('selection.GROWTH_STALL', 5):
+            for i in range(5000):
+                selection.step('All', 'Insert')
+                if selection.parent.n_genes == 8:
+                    break
+        self.assertEqual(selection.parent.n_genes, 8)
+        self.assertEqual(len(selection.descendant.genes), 8)
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(1)
+        self.omega = load_omega(PEARL).resize((32, 24))
+        self.parent = Chromosome()
+        self.parent.setup(32, 24, 4, 20)
+        for gene in self.parent.genes:
+            gene.mutate('Hard')
+        self.children = []
+        for k in range(8):
+            child = copy.deepcopy(self.parent)
+            child.mutate('All', swap=True)
+            self.children.append(child)
+
+    def test_matches_single_rendering(self):
+        out = np.zeros((8, 24, 32, 3), dtype=np.uint8)
+        phenotypes = Chromosome.make_phenotypes(self.children, self.parent,
+                                                BACKGROUND, out)
+        self.assertIs(phenotypes, out)
+        fitnesses = Chromosome.calc_fitnesses(phenotypes, self.omega)
+        self.assertEqual(fitnesses.shape, (8,))
+        for k, child in enumerate(self.children):
+            child.make_phenotype(BACKGROUND)
+            child.calc_fitness(self.omega)
+            np.testing.assert_array_equal(phenotypes[k],
+                                          np.asarray(child.phenotype))
+            self.assertEqual(fitnesses[k], child.fitness)
+
+    def test_out_shape(self):
+        out = np.zeros((7, 24, 32, 3), dtype=np.uint8)
+        self.assertRaises(ValueError, Chromosome.make_phenotypes,
+                          self.children, self.parent, BACKGROUND, out)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from .context import PEARL
+from export import FrameExporter
+from selection import load_omega
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class Alpha(object):
+    """Stand-in for an accepted chromosome"""
+
+    def __init__(self, phenotype):
+        self.phenotype = phenotype
+
+
+class Broken(object):
+    """Stand-in for a phenotype that can't be saved"""
+
+    def save(self, filename):
+        raise OSError("disk full")
+
+
+class TestFrameExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.alpha = Alpha(load_omega(PEARL).resize((16, 12)))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_every_n(self):
+        exporter = FrameExporter(self.directory, every_n=3)
+        for i in range(9):
+            exporter.offer(self.alpha)
+        exporter.stop()
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['frame_000000.png', 'frame_000001.png',
+                          'frame_000002.png'])
+
+    def test_every_t(self):
+        exporter = FrameExporter(self.directory, every_t=3600)
+        for i in range(5):
+            exporter.offer(self.alpha)
+        exporter.stop()
+        self.assertEqual(exporter.frames, 1)
+
+    def test_continues_existing_sequence(self):
+        for i in range(2):
+            exporter = FrameExporter(self.directory)
+            exporter.offer(self.alpha)
+            exporter.offer(self.alpha)
+            exporter.stop()
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['frame_%06d.png' % i for i in range(4)])
+
+    def test_failed_save_leaves_no_gap(self):
+        exporter = FrameExporter(self.directory)
+        exporter.offer(Alpha(Broken()))
+        exporter.offer(self.alpha)
+        exporter.stop()
+        self.assertEqual(exporter.dropped, 1)
+        self.assertEqual(os.listdir(self.directory), ['frame_000000.png'])
+
+    def test_full_queue_drops(self):
+        exporter = FrameExporter(self.directory, maxsize=1)
+        exporter._queue.put(None)  # end the writer so frames pile up
+        exporter._thread.join()
+        self.assertTrue(exporter.offer(self.alpha))
+        self.assertFalse(exporter.offer(self.alpha))
+        self.assertEqual(exporter.frames, 1)
+        self.assertEqual(exporter.dropped, 1)
+
+    def test_bad_policy(self):
+        self.assertRaises(ValueError, FrameExporter, self.directory, 0)
+        self.assertRaises(ValueError, FrameExporter, self.directory, 1, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
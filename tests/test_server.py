@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+from .context import PEARL
+import server
+import asyncio
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SERVER = os.path.join(os.path.dirname(server.__file__), 'server.py')
+
+
+class Client(object):
+    """Line based JSON client for the tests"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, request):
+        if not isinstance(request, str):
+            request = json.dumps(request)
+        self.writer.write((request + '\n').encode())
+        await self.writer.drain()
+
+    async def read(self):
+        line = await asyncio.wait_for(self.reader.readline(), 30)
+        return json.loads(line)
+
+    async def ask(self, request):
+        await self.send(request)
+        return await self.read()
+
+    async def read_until(self, states, job=None):
+        while True:
+            status = await self.read()
+            if job is not None and status.get('job') != job:
+                continue
+            if status.get('state') in states:
+                return status
+
+
+def run_server(test, workers=1, frames_root=None):
+    """Run coroutine test(client) against a JobServer on localhost."""
+    async def main():
+        job_server = server.JobServer(port=0, workers=workers,
+                                      frames_root=frames_root)
+        await job_server.start()
+        reader, writer = await asyncio.open_connection('127.0.0.1',
+                                                       job_server.port)
+        try:
+            await test(Client(reader, writer))
+        finally:
+            writer.close()
+            await job_server.close()
+    asyncio.run(main())
+
+
+class TestJobServer(unittest.TestCase):
+
+    def test_submit_subscribe_finished(self):
+        async def test(client):
+            status = await client.ask({'cmd': 'submit', 'target': PEARL,
+                                       'n_genes': 5, 'generations': 200})
+            self.assertIn(status['state'], ('queued', 'running'))
+            await client.send({'cmd': 'subscribe', 'job': status['job']})
+            status = await client.read_until(server.TERMINAL)
+            self.assertEqual(status['state'], 'finished')
+            self.assertEqual(status['generations'], 200)
+            reply = await client.ask({'cmd': 'image', 'job': 1})
+            self.assertTrue(reply['png'])
+        run_server(test)
+
+    def test_pause_resume_cancel(self):
+        async def test(client):
+            await client.ask({'cmd': 'submit', 'target': PEARL, 'n_genes': 5})
+            status = await client.ask({'cmd': 'pause', 'job': 1})
+            self.assertEqual(status['state'], 'paused')
+            status = await client.ask({'cmd': 'resume', 'job': 1})
+            self.assertIn(status['state'], ('queued', 'running'))
+            await client.send({'cmd': 'subscribe', 'job': 1})
+            status = await client.read_until(('running',))
+            await client.send({'cmd': 'cancel', 'job': 1})
+            status = await client.read_until(server.TERMINAL)
+            self.assertEqual(status['state'], 'cancelled')
+        run_server(test)
+
+    def test_paused_and_cancelled_while_queued(self):
+        async def test(client):
+            await client.ask({'cmd': 'submit', 'target': PEARL, 'n_genes': 5})
+            status = await client.ask({'cmd': 'submit', 'target': PEARL})
+            self.assertEqual(status['state'], 'queued')
+            status = await client.ask({'cmd': 'pause', 'job': 2})
+            self.assertEqual(status['state'], 'paused')
+            await client.send({'cmd': 'subscribe', 'job': 2})
+            status = await client.read()
+            self.assertEqual(status['state'], 'paused')
+            await client.send({'cmd': 'cancel', 'job': 2})
+            status = await client.read_until(server.TERMINAL)
+            self.assertEqual(status['state'], 'cancelled')
+            await client.ask({'cmd': 'cancel', 'job': 1})
+        run_server(test)
+
+    def test_malformed_requests(self):
+        async def test(client):
+            reply = await client.ask({'cmd': 'submit'})
+            self.assertEqual(reply, {'error': "missing key 'target'"})
+            reply = await client.ask('[1]')
+            self.assertIn('error', reply)
+            reply = await client.ask('not json')
+            self.assertIn('error', reply)
+            reply = await client.ask({'cmd': 'status', 'job': 7})
+            self.assertEqual(reply, {'error': 'unknown job 7'})
+            reply = await client.ask({'cmd': 'submit', 'target': PEARL,
+                                      'mutation': 'Wild'})
+            self.assertIn('error', reply)
+            reply = await client.ask({'cmd': 'bogus'})
+            self.assertIn('error', reply)
+            # the connection survives all of the above
+            reply = await client.ask({'cmd': 'list'})
+            self.assertEqual(reply, {'jobs': []})
+        run_server(test)
+
+    def test_workers_run_together(self):
+        async def test(client):
+            for i in range(3):
+                await client.ask({'cmd': 'submit', 'target': PEARL,
+                                  'n_genes': 5})
+            reply = await client.ask({'cmd': 'list'})
+            states = [job['state'] for job in reply['jobs']]
+            self.assertEqual(states, ['running', 'running', 'queued'])
+            # pausing keeps the process, the third job keeps waiting
+            await client.ask({'cmd': 'pause', 'job': 1})
+            status = await client.ask({'cmd': 'status', 'job': 3})
+            self.assertEqual(status['state'], 'queued')
+            await client.send({'cmd': 'subscribe', 'job': 3})
+            await client.send({'cmd': 'cancel', 'job': 1})
+            await client.read_until(('running',), job=3)
+        run_server(test, workers=2)
+
+    def test_close_with_paused_job(self):
+        async def test(client):
+            await client.ask({'cmd': 'submit', 'target': PEARL, 'n_genes': 5})
+            status = await client.ask({'cmd': 'pause', 'job': 1})
+            self.assertEqual(status['state'], 'paused')
+        # run_server returning means close() did not hang
+        run_server(test)
+
+    def test_remove(self):
+        async def test(client):
+            await client.ask({'cmd': 'submit', 'target': PEARL, 'n_genes': 5})
+            reply = await client.ask({'cmd': 'remove', 'job': 1})
+            self.assertIn('error', reply)
+            await client.send({'cmd': 'subscribe', 'job': 1})
+            await client.ask({'cmd': 'cancel', 'job': 1})
+            await client.read_until(server.TERMINAL)
+            reply = await client.ask({'cmd': 'remove', 'job': 1})
+            self.assertEqual(reply, {'job': 1, 'removed': True})
+            reply = await client.ask({'cmd': 'list'})
+            self.assertEqual(reply, {'jobs': []})
+        run_server(test)
+
+    def test_limits(self):
+        async def test(client):
+            for settings in [{'n_genes': 0}, {'n_genes': 1001},
+                             {'n_vertices': 2}, {'n_vertices': 11},
+                             {'generations': -1}]:
+                settings.update({'cmd': 'submit', 'target': PEARL})
+                reply = await client.ask(settings)
+                self.assertIn('error', reply)
+        run_server(test)
+
+    def test_line_too_long(self):
+        async def test(client):
+            reply = await client.ask('"' + 'x' * 100000 + '"')
+            self.assertEqual(reply, {'error': 'request line too long'})
+            self.assertEqual(await client.reader.read(), b'')
+        run_server(test)
+
+    def test_sigint_with_paused_job(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        process = subprocess.Popen([sys.executable, SERVER, '--port',
+                                    str(port)], cwd=os.path.dirname(SERVER))
+        self.addCleanup(process.kill)
+
+        async def test():
+            for i in range(100):
+                try:
+                    reader, writer = await asyncio.open_connection(
+                        '127.0.0.1', port)
+                    break
+                except OSError:
+                    await asyncio.sleep(0.1)
+            client = Client(reader, writer)
+            await client.ask({'cmd': 'submit', 'target': PEARL, 'n_genes': 5})
+            await client.send({'cmd': 'subscribe', 'job': 1})
+            await client.read_until(('running',))
+            await client.send({'cmd': 'pause', 'job': 1})
+            await client.read_until(('paused',))
+            process.send_signal(signal.SIGINT)
+            await client.read_until(server.TERMINAL)
+            writer.close()
+        asyncio.run(test())
+        self.assertEqual(process.wait(30), 0)
+
+    def test_frames(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+
+        async def test(client):
+            reply = await client.ask({'cmd': 'submit', 'target': PEARL,
+                                      'frames': 'run', 'frames_every': 0})
+            self.assertIn('error', reply)
+            reply = await client.ask({'cmd': 'submit', 'target': PEARL,
+                                      'frames': '../escape'})
+            self.assertIn('error', reply)
+            status = await client.ask({'cmd': 'submit', 'target': PEARL,
+                                       'n_genes': 5, 'generations': 200,
+                                       'frames': 'run', 'frames_every': 1})
+            await client.send({'cmd': 'subscribe', 'job': status['job']})
+            status = await client.read_until(server.TERMINAL)
+            self.assertEqual(status['state'], 'finished')
+            frames = os.listdir(os.path.join(root, 'run'))
+            # frames may be dropped, never more than the improvements
+            self.assertTrue(0 < len(frames) <= status['mutations'])
+        run_server(test, frames_root=root)
+
+    def test_frames_need_root(self):
+        async def test(client):
+            reply = await client.ask({'cmd': 'submit', 'target': PEARL,
+                                      'frames': 'run'})
+            self.assertIn('error', reply)
+        run_server(test)
+
+
+if __name__ == '__main__':
+    unittest.main()